@@ -3,7 +3,7 @@ AI-Powered Code Review Assistant - Streamlit UI
 Main application file with user interface.
 """
 import streamlit as st
-import pandas as pd
+from collections import defaultdict
 from datetime import datetime
 import json
 from reviewer import CodeReviewer
@@ -16,8 +16,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS for better styling
-st.markdown("""
+# Static markdown built once at import time so reruns don't rebuild strings
+_CSS = """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -34,7 +34,88 @@ st.markdown("""
         margin-bottom: 1rem;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+_PYTHON_TOOLS = """**Static Analysis:**
+
+• **Pylint** (Code quality)
+
+• **Bandit** (Security)"""
+
+_JS_TOOLS = """**Static Analysis:**
+
+• **ESLint** (Code quality)"""
+
+_AI_TOOLS = """**🤖 AI Analysis:**
+
+• **CodeT5** (Hugging Face)
+
+• Code summary & suggestions
+
+• Bug detection
+
+• Refactoring ideas"""
+
+_INSTRUCTIONS = """
+**How to use:**
+1. Select your programming language
+2. Paste your code in the text area
+3. Click "Run AI Review"
+4. View results in the sections below
+
+**What you'll get:**
+- 🤖 AI-powered code analysis
+- 🔍 Static analysis results
+- 🔒 Security scan results
+- 💡 Improvement suggestions
+"""
+
+_FOOTER = '<div style="text-align: center; color: #6c757d; font-size: 0.9rem; margin-top: 3rem;">Built with ❤️ using Hugging Face CodeT5 + Streamlit</div>'
+
+# Custom CSS for better styling
+st.markdown(_CSS, unsafe_allow_html=True)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _cached_review(code: str, language: str, _reviewer=None):
+    """Memoize full review results so identical submissions return instantly.
+
+    _reviewer is excluded from the cache key (leading underscore). The
+    stream renderer is created *inside* this function so every element the
+    streaming callback touches lives within the cache replay boundary;
+    elements created outside a cached function raise
+    CacheReplayClosureError when the entry is replayed on a hit.
+    """
+    reviewer = _reviewer if _reviewer is not None else CodeReviewer()
+    streamer = _StreamRenderer()
+    try:
+        return reviewer.review_code(code, language, on_chunk=streamer)
+    finally:
+        streamer.clear()
+
+class _StreamRenderer:
+    """Render streamed AI feedback block by block.
+
+    Completed paragraphs are emitted once as their own markdown elements;
+    only the trailing partial paragraph is re-rendered on each chunk, so
+    the markdown parse cost stays O(chunk) instead of O(full text).
+    """
+
+    def __init__(self):
+        self._outer = st.empty()
+        box = self._outer.container()
+        self._stable = box.container()
+        self._tail = box.empty()
+        self._done = 0
+
+    def __call__(self, text):
+        blocks = text.split("\n\n")
+        while self._done < len(blocks) - 1:
+            self._stable.markdown(blocks[self._done])
+            self._done += 1
+        self._tail.markdown(blocks[-1])
+
+    def clear(self):
+        self._outer.empty()
 
 def display_pylint_results(pylint_data):
     if not pylint_data or not pylint_data.get("success"):
@@ -47,20 +128,21 @@ def display_pylint_results(pylint_data):
         return
     
     st.subheader("Pylint Issues by Type")
-    issues_by_type = {}
+    issues_by_type = defaultdict(list)
     for issue in results:
-        issue_type = issue.get("type", "Unknown")
-        if issue_type not in issues_by_type:
-            issues_by_type[issue_type] = []
-        issues_by_type[issue_type].append(issue)
+        issues_by_type[issue.get("type", "Unknown")].append(issue)
     
+    # One st.markdown per group instead of several per issue keeps the
+    # frontend from re-rendering hundreds of tiny elements.
     for issue_type, issues in issues_by_type.items():
-        st.markdown(f"### {issue_type} ({len(issues)} issues)")
+        lines = [f"### {issue_type} ({len(issues)} issues)"]
         for issue in issues:
-            with st.container():
-                st.markdown(f"**Line {issue.get('line', 'N/A')}:** {issue.get('message', 'No message')}")
-                st.markdown(f"*Confidence: {issue.get('confidence', 'N/A')}*")
-                st.markdown("---")
+            lines.append(
+                f"**Line {issue.get('line', 'N/A')}:** {issue.get('message', 'No message')}\n\n"
+                f"*Confidence: {issue.get('confidence', 'N/A')}*\n\n"
+                "---"
+            )
+        st.markdown("\n\n".join(lines))
 
 def display_bandit_results(bandit_data):
     if not bandit_data or not bandit_data.get("success"):
@@ -77,14 +159,17 @@ def display_bandit_results(bandit_data):
     st.warning(f"🔒 Found {len(issues)} security issue(s)")
     
     st.subheader("Security Issues")
+    lines = []
     for i, issue in enumerate(issues, 1):
-        with st.container():
-            st.markdown(f"**{i}. {issue.get('test_name', 'Unknown')} - {issue.get('severity', 'Unknown')}**")
-            st.markdown(f"**Issue:** {issue.get('issue_text', 'No description')}")
-            st.markdown(f"**Severity:** {issue.get('severity', 'Unknown')}")
-            st.markdown(f"**Confidence:** {issue.get('confidence', 'Unknown')}")
-            st.markdown(f"**Line {issue.get('line_number', 'N/A')}:** `{issue.get('code', 'N/A')}`")
-            st.markdown("---")
+        lines.append(
+            f"**{i}. {issue.get('test_name', 'Unknown')} - {issue.get('severity', 'Unknown')}**\n\n"
+            f"**Issue:** {issue.get('issue_text', 'No description')}\n\n"
+            f"**Severity:** {issue.get('severity', 'Unknown')}\n\n"
+            f"**Confidence:** {issue.get('confidence', 'Unknown')}\n\n"
+            f"**Line {issue.get('line_number', 'N/A')}:** `{issue.get('code', 'N/A')}`\n\n"
+            "---"
+        )
+    st.markdown("\n\n".join(lines))
 
 def display_eslint_results(eslint_data):
     if not eslint_data or not eslint_data.get("success"):
@@ -104,16 +189,18 @@ def display_eslint_results(eslint_data):
             st.success(f"✅ No issues in {file_path}")
             continue
         
-        st.markdown(f"### {file_path} ({len(messages)} issues)")
+        lines = [f"### {file_path} ({len(messages)} issues)"]
         for message in messages:
-            with st.container():
-                severity = message.get("severity", 1)
-                severity_text = "Error" if severity == 2 else "Warning"
-                st.markdown(f"**Line {message.get('line', 'N/A')}:** {message.get('message', 'No message')}")
-                st.markdown(f"*Severity: {severity_text}*")
-                if message.get("ruleId"):
-                    st.markdown(f"*Rule: {message['ruleId']}*")
-                st.markdown("---")
+            severity = message.get("severity", 1)
+            severity_text = "Error" if severity == 2 else "Warning"
+            block = (
+                f"**Line {message.get('line', 'N/A')}:** {message.get('message', 'No message')}\n\n"
+                f"*Severity: {severity_text}*"
+            )
+            if message.get("ruleId"):
+                block += f"\n\n*Rule: {message['ruleId']}*"
+            lines.append(block + "\n\n---")
+        st.markdown("\n\n".join(lines))
 
 def display_ai_results(ai_data):
     if not ai_data or not ai_data.get("success"):
@@ -126,47 +213,59 @@ def display_ai_results(ai_data):
     st.info(f"🤖 AI Analysis powered by {model_used}")
     st.markdown(feedback)
 
-def download_report(review_results):
-    language = review_results.get('language', 'Unknown')
-    
-    report_content = f"""AI-Powered Code Review Report
-Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-Language: {language}
+_REPORT_HEADER = """AI-Powered Code Review Report
+Generated: {ts}
+Language: {lang}
 
 === STATIC ANALYSIS RESULTS ===
 """
-    
+
+@st.cache_data(show_spinner=False)
+def download_report(review_results):
+    language = review_results.get('language', 'Unknown')
+
+    # Collect parts and join once at the end; += on a growing string
+    # copies the whole buffer every time.
+    parts = [_REPORT_HEADER.format(
+        ts=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        lang=language
+    )]
+
     static_analysis = review_results.get("static_analysis", {})
-    
+
     # Pylint section
     if static_analysis.get("pylint") and static_analysis["pylint"].get("success"):
-        report_content += "\n--- PYLINT RESULTS ---\n"
+        parts.append("\n--- PYLINT RESULTS ---\n")
         results = static_analysis["pylint"].get("results", [])
         if results:
-            for issue in results:
-                report_content += f"Line {issue.get('line', 'N/A')}: {issue.get('message', 'No message')}\n"
+            parts.extend(
+                f"Line {issue.get('line', 'N/A')}: {issue.get('message', 'No message')}\n"
+                for issue in results
+            )
         else:
-            report_content += "No pylint issues found.\n"
-    
-    # Bandit section  
+            parts.append("No pylint issues found.\n")
+
+    # Bandit section
     if static_analysis.get("bandit") and static_analysis["bandit"].get("success"):
-        report_content += "\n--- BANDIT SECURITY RESULTS ---\n"
+        parts.append("\n--- BANDIT SECURITY RESULTS ---\n")
         results = static_analysis["bandit"].get("results", {})
         issues = results.get("results", [])
         if issues:
-            for issue in issues:
-                report_content += f"Line {issue.get('line_number', 'N/A')}: {issue.get('issue_text', 'No description')} ({issue.get('severity', 'LOW')})\n"
+            parts.extend(
+                f"Line {issue.get('line_number', 'N/A')}: {issue.get('issue_text', 'No description')} ({issue.get('severity', 'LOW')})\n"
+                for issue in issues
+            )
         else:
-            report_content += "No security issues found.\n"
-    
+            parts.append("No security issues found.\n")
+
     # AI section
     ai_analysis = review_results.get("ai_analysis", {})
     if ai_analysis.get("success"):
-        report_content += f"\n=== AI ANALYSIS RESULTS ===\n"
-        report_content += f"Model: {ai_analysis.get('model_used', 'CodeT5')}\n\n"
-        report_content += ai_analysis.get("feedback", "No AI feedback")
-    
-    return report_content
+        parts.append("\n=== AI ANALYSIS RESULTS ===\n")
+        parts.append(f"Model: {ai_analysis.get('model_used', 'CodeT5')}\n\n")
+        parts.append(ai_analysis.get("feedback", "No AI feedback"))
+
+    return "".join(parts)
 
 def main():
     st.markdown('<h1 class="main-header">🤖 AI-Powered Code Review Assistant</h1>', unsafe_allow_html=True)
@@ -177,6 +276,8 @@ def main():
         st.session_state.review_results = None
     if 'current_language' not in st.session_state:
         st.session_state.current_language = "Python"
+    if 'reviewer' not in st.session_state:
+        st.session_state.reviewer = CodeReviewer()
     
     # Sidebar for configuration
     with st.sidebar:
@@ -193,18 +294,11 @@ def main():
         st.markdown("### 🛠️ Analysis Tools")
         
         if language == "Python":
-            st.markdown("**Static Analysis:**")
-            st.markdown("• **Pylint** (Code quality)")
-            st.markdown("• **Bandit** (Security)")
+            st.markdown(_PYTHON_TOOLS)
         elif language == "JavaScript":
-            st.markdown("**Static Analysis:**")
-            st.markdown("• **ESLint** (Code quality)")
-        
-        st.markdown("**🤖 AI Analysis:**")
-        st.markdown("• **CodeT5** (Hugging Face)")
-        st.markdown("• Code summary & suggestions")
-        st.markdown("• Bug detection")
-        st.markdown("• Refactoring ideas")
+            st.markdown(_JS_TOOLS)
+
+        st.markdown(_AI_TOOLS)
     
     # Main content area
     col1, col2 = st.columns([2, 1])
@@ -226,9 +320,11 @@ def main():
             else:
                 with st.spinner("🔄 Analyzing your code... This may take 30-60 seconds."):
                     try:
-                        reviewer = CodeReviewer()
-                        results = reviewer.review_code(code, language)
-                        
+                        results = _cached_review(
+                            code, language,
+                            _reviewer=st.session_state.reviewer
+                        )
+
                         st.session_state.review_results = results
                         st.session_state.current_language = language
                         st.success("✅ Code review completed!")
@@ -240,19 +336,7 @@ def main():
     with col2:
         st.markdown('<h3 class="section-header">📖 Instructions</h3>', unsafe_allow_html=True)
         
-        st.markdown("""
-        **How to use:**
-        1. Select your programming language
-        2. Paste your code in the text area
-        3. Click "Run AI Review"
-        4. View results in the sections below
-        
-        **What you'll get:**
-        - 🤖 AI-powered code analysis
-        - 🔍 Static analysis results
-        - 🔒 Security scan results
-        - 💡 Improvement suggestions
-        """)
+        st.markdown(_INSTRUCTIONS)
     
     # Display results if available
     if st.session_state.review_results:
@@ -288,23 +372,8 @@ def main():
             with st.expander("📋 Combined Suggestions", expanded=False):
                 st.markdown("### Summary of All Findings")
                 
-                issue_count = 0
-                
-                pylint_data = static_analysis.get("pylint")
-                if pylint_data and pylint_data.get("success") and pylint_data.get("results"):
-                    issue_count += len(pylint_data["results"])
-                
-                bandit_data = static_analysis.get("bandit")
-                if bandit_data and bandit_data.get("success"):
-                    results_b = bandit_data.get("results", {})
-                    issues = results_b.get("results", [])
-                    issue_count += len(issues)
-                
-                eslint_data = static_analysis.get("eslint")
-                if eslint_data and eslint_data.get("success") and eslint_data.get("results"):
-                    for file_result in eslint_data["results"]:
-                        issue_count += len(file_result.get("messages", []))
-                
+                issue_count = results.get("issue_counts", {}).get("total", 0)
+
                 if issue_count > 0:
                     st.warning(f"⚠️ Found {issue_count} total issues across all analyses")
                 else:
@@ -331,7 +400,7 @@ def main():
     
     # Footer
     st.markdown("---")
-    st.markdown('<div style="text-align: center; color: #6c757d; font-size: 0.9rem; margin-top: 3rem;">Built with ❤️ using Hugging Face CodeT5 + Streamlit</div>', unsafe_allow_html=True)
+    st.markdown(_FOOTER, unsafe_allow_html=True)
 
 if __name__ == "__main__":
     main()